@@ -1,38 +1,82 @@
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Literal, Optional, get_args
+import anyio
+import os
 import uvicorn
 from .analyzer import TimeComplexityAnalyzer
 
-# ML Integration
 try:
-    from .ml_integration import analyze_with_ml, ML_AVAILABLE
+    import orjson
+except ImportError:
+    orjson = None
+
+# ML Integration: ML_BACKEND=simple swaps the hybrid analyzer behind /analyze-ml for the
+# lightweight TF-IDF model in ml_integration_simple; only the selected module is imported
+ML_BACKEND = os.getenv("ML_BACKEND", "hybrid")
+try:
+    if ML_BACKEND == "simple":
+        from .ml_integration_simple import analyze_with_ml, ML_AVAILABLE
+    else:
+        from .ml_integration import analyze_with_ml, ML_AVAILABLE
     print(f"🤖 ML Integration: {'Available' if ML_AVAILABLE else 'Not Available'}")
 except ImportError:
     print("⚠️ ML Integration not available")
     ML_AVAILABLE = False
     analyze_with_ml = None
 
+# Analysis endpoints are sync defs run on anyio's threadpool; allow more than its default 40
+THREADPOOL_SIZE = 100
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    yield
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered by orjson when it is installed, stdlib json otherwise"""
+    
+    def render(self, content) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        # Analysis results can carry numpy scalars from the ML models
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
 app = FastAPI(
     title="TimeComplexity Analyzer API",
     description="API for analyzing time and space complexity of code",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
-# Add CORS middleware for Chrome extension
+# Add CORS middleware for Chrome extension. EXTENSION_IDS (comma-separated) pins the
+# published extension origins for exact matching; only when it is unset is any
+# chrome-extension:// origin accepted, so unpacked development builds keep working
+EXTENSION_IDS = [ext_id.strip() for ext_id in os.getenv("EXTENSION_IDS", "").split(",") if ext_id.strip()]
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # Allow all origins for Chrome extension
+    allow_origins=[f"chrome-extension://{ext_id}" for ext_id in EXTENSION_IDS],
+    allow_origin_regex=None if EXTENSION_IDS else r"chrome-extension://[a-p]{32}",
     allow_credentials=False,  # Set to False for Chrome extension
-    allow_methods=["GET", "POST", "OPTIONS"],  # Explicitly allow OPTIONS
-    allow_headers=["*"],
-    expose_headers=["*"],
+    allow_methods=["GET", "POST"],  # Preflight OPTIONS is answered by the middleware itself
+    allow_headers=["Content-Type"],
 )
 
+# Long breakdown/suggestion lists compress well; small responses go out uncompressed
+app.add_middleware(GZipMiddleware, minimum_size=512, compresslevel=5)
+
+# Unsupported languages are rejected by pydantic-core with a 422 before a handler runs
+Language = Literal["python", "cpp", "java", "javascript", "c", "go", "rust"]
+SUPPORTED_LANGUAGES = get_args(Language)
+
 class AnalysisRequest(BaseModel):
     code: str
-    language: str
+    language: Language
 
 class AnalysisResponse(BaseModel):
     time_complexity: str
@@ -42,7 +86,13 @@ class AnalysisResponse(BaseModel):
     confidence: float
 
 # Initialize the analyzer
-from .ml_integration import analyze_with_ml as analyze_ml_hybrid
+analyzer = TimeComplexityAnalyzer()
+# /analyze always runs the hybrid analysis, or the rule-based one without it; the simple
+# model is too coarse to serve it and only answers /analyze-ml
+analyze_ml_hybrid = analyze_with_ml if analyze_with_ml and ML_BACKEND != "simple" else analyzer.analyze
+
+# Simple-model predictions below this confidence are replaced by the /analyze result
+SIMPLE_ML_MIN_CONFIDENCE = 0.6
 
 @app.get("/")
 async def root():
@@ -52,8 +102,10 @@ async def root():
         "status": "running"
     }
 
-@app.post("/analyze", response_model=AnalysisResponse)
-async def analyze_code(request: AnalysisRequest):
+# AnalysisResponse documents the shape only; the handler returns a plain dict so
+# FastAPI skips building and validating a response model on every call
+@app.post("/analyze", responses={200: {"model": AnalysisResponse}})
+def analyze_code(request: AnalysisRequest):
     """
     Analyze the time and space complexity of the provided code.
     
@@ -67,19 +119,16 @@ async def analyze_code(request: AnalysisRequest):
         if not request.code.strip():
             raise HTTPException(status_code=400, detail="Code cannot be empty")
         
-        if request.language not in ["python", "cpp", "java", "javascript", "c", "go", "rust"]:
-            raise HTTPException(status_code=400, detail="Unsupported language")
-        
-        # Perform ML-enhanced hybrid analysis
+        # Perform ML-enhanced hybrid analysis; the analyzer caches results per snippet
         result = analyze_ml_hybrid(request.code, request.language)
         
-        return AnalysisResponse(
-            time_complexity=result["time_complexity"],
-            space_complexity=result["space_complexity"],
-            breakdown=result.get("breakdown", []),
-            suggestions=result.get("suggestions", []),
-            confidence=result.get("confidence", result.get("ensemble_confidence", 0.0))
-        )
+        return {
+            "time_complexity": result["time_complexity"],
+            "space_complexity": result["space_complexity"],
+            "breakdown": result.get("breakdown", []),
+            "suggestions": result.get("suggestions", []),
+            "confidence": float(result.get("confidence", result.get("ensemble_confidence", 0.0)))
+        }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
@@ -89,64 +138,56 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "analyzer": "ready"}
 
-@app.options("/analyze")
-async def analyze_options():
-    """Handle OPTIONS requests for /analyze endpoint"""
-    return {"message": "OK"}
-
-@app.options("/analyze-ml")
-async def analyze_ml_options():
-    """Handle OPTIONS requests for /analyze-ml endpoint"""
-    return {"message": "OK"}
+# Static payload, serialized once at import rather than rebuilt on every poll
+SUPPORTED_LANGUAGES_BODY = FastJSONResponse({
+    "languages": list(SUPPORTED_LANGUAGES),
+    "features": {
+        "python": ["AST parsing", "Loop detection", "Recursion analysis"],
+        "cpp": ["AST parsing", "Loop detection", "Recursion analysis"],
+        "java": ["AST parsing", "Loop detection", "Recursion analysis"],
+        "javascript": ["AST parsing", "Loop detection", "Recursion analysis"],
+        "c": ["Pattern matching", "Loop detection", "Recursion analysis"],
+        "go": ["Pattern matching", "Loop detection", "Recursion analysis"],
+        "rust": ["Pattern matching", "Loop detection", "Recursion analysis"]
+    }
+}).body
 
 @app.get("/supported-languages")
 async def get_supported_languages():
     """Get list of supported programming languages"""
-    return {
-        "languages": ["python", "cpp", "java", "javascript", "c", "go", "rust"],
-        "features": {
-            "python": ["AST parsing", "Loop detection", "Recursion analysis"],
-            "cpp": ["AST parsing", "Loop detection", "Recursion analysis"],
-            "java": ["AST parsing", "Loop detection", "Recursion analysis"],
-            "javascript": ["AST parsing", "Loop detection", "Recursion analysis"],
-            "c": ["Pattern matching", "Loop detection", "Recursion analysis"],
-            "go": ["Pattern matching", "Loop detection", "Recursion analysis"],
-            "rust": ["Pattern matching", "Loop detection", "Recursion analysis"]
-        }
-    }
+    return Response(content=SUPPORTED_LANGUAGES_BODY, media_type="application/json")
 
 
 @app.post("/analyze-ml")
-async def analyze_with_ml_endpoint(request: AnalysisRequest):
+def analyze_with_ml_endpoint(request: AnalysisRequest):
     """Analyze code using ML-enhanced approach"""
     try:
         if not request.code.strip():
             raise HTTPException(status_code=400, detail="Code cannot be empty")
         
-        if request.language not in ["python", "cpp", "java", "javascript", "c", "go", "rust"]:
-            raise HTTPException(status_code=400, detail="Unsupported language")
-        
-        if analyze_with_ml and ML_AVAILABLE:
+        if ML_BACKEND == "simple" and analyze_with_ml and ML_AVAILABLE:
             result = analyze_with_ml(request.code, request.language)
-            return result
-        else:
-            # Fallback to regular analysis
-            result = analyzer.analyze(request.code, request.language)
-            return AnalysisResponse(
-                time_complexity=result["time_complexity"],
-                space_complexity=result["space_complexity"],
-                breakdown=result["breakdown"],
-                suggestions=result["suggestions"],
-                confidence=result["confidence"]
-            )
+            if result["confidence"] >= SIMPLE_ML_MIN_CONFIDENCE:
+                return result
+        
+        # The hybrid entry point /analyze uses (rule-based without ML), so they share its cache
+        return analyze_ml_hybrid(request.code, request.language)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 if __name__ == "__main__":
+    # reload and multiple workers are mutually exclusive in uvicorn. Each worker loads its
+    # own ML models and caches, so run one unless UVICORN_WORKERS asks for more
+    reload = os.getenv("UVICORN_RELOAD", "0") == "1"
+    workers = 1 if reload else int(os.getenv("UVICORN_WORKERS", "1"))
     uvicorn.run(
-        "main:app",
+        "backend.main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
+        reload=reload,
+        workers=workers,
+        # "auto" picks uvloop and httptools when installed, asyncio and h11 otherwise
+        loop="auto",
+        http="auto",
         log_level="info"
     ) 
\ No newline at end of file
@@ -4,13 +4,17 @@ ML Integration for TimeComplexity Analyzer Backend
 Integrates ML models with the main FastAPI backend
 """
 
-import os
 import sys
 from pathlib import Path
 
-# Add ML integration to path
-ml_path = Path(__file__).parent.parent / "ml_integration"
-sys.path.append(str(ml_path))
+from .analyzer import TimeComplexityAnalyzer
+
+# ml_integration is a package at the project root; make the root importable once,
+# independent of the working directory the server was started from
+project_root = str(Path(__file__).resolve().parent.parent)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+ml_path = Path(project_root) / "ml_integration"
 
 try:
     from ml_integration.hybrid_analyzer import HybridTimeComplexityAnalyzer
@@ -24,19 +28,16 @@ try:
     
 except ImportError as e:
     print(f"⚠️ ML integration not available: {e}")
-    print(f"Current working directory: {os.getcwd()}")
-    print(f"Python path: {sys.path}")
-    import traceback
-    traceback.print_exc()
     ML_AVAILABLE = False
     hybrid_analyzer = None
 
+# Rule-based analyzer used when the ML stack is unavailable, built once so its caches persist
+fallback_analyzer = TimeComplexityAnalyzer()
+
 def analyze_with_ml(code: str, language: str = "python"):
     """Analyze code using ML-enhanced approach"""
     if ML_AVAILABLE and hybrid_analyzer:
         return hybrid_analyzer.analyze(code, language)
     else:
         # Fallback to rule-based analysis
-        from .analyzer import TimeComplexityAnalyzer
-        analyzer = TimeComplexityAnalyzer()
-        return analyzer.analyze(code, language)
+        return fallback_analyzer.analyze(code, language)
@@ -4,150 +4,297 @@ Simplified ML Integration for TimeComplexity Analyzer Backend
 Lightweight version that works reliably on free hosting platforms
 """
 
+import importlib.util
 import os
+import queue
+import re
 import sys
+import threading
+import time
+from concurrent.futures import Future
 from pathlib import Path
 
 # Add ML integration to path
 ml_path = Path(__file__).parent.parent / "ml_integration"
 sys.path.append(str(ml_path))
 
-try:
-    # Try to import basic ML libraries first
-    import pandas as pd
-    import numpy as np
-    from sklearn.ensemble import RandomForestClassifier
-    from sklearn.feature_extraction.text import TfidfVectorizer
-    import joblib
-    
-    print("✅ Basic ML libraries loaded successfully")
-    
-    # Simple ML-based complexity analyzer
-    class SimpleMLAnalyzer:
-        def __init__(self):
-            self.vectorizer = TfidfVectorizer(max_features=1000, stop_words='english')
-            self.model = None
-            self.is_trained = False
-            
-        def train_simple_model(self):
-            """Train a simple model with basic patterns"""
-            # Simple training data based on code patterns
-            training_data = [
-                ("for i in range(n):", "O(n)"),
-                ("for i in range(n): for j in range(n):", "O(n²)"),
-                ("while left <= right:", "O(log n)"),
-                ("if x in list:", "O(n)"),
-                ("if x in set:", "O(1)"),
-                ("def recursive_function(n):", "O(2ⁿ)"),
-                ("return recursive_function(n-1)", "O(2ⁿ)"),
-                ("arr.sort()", "O(n log n)"),
-                ("return arr[0]", "O(1)"),
-                ("return len(arr)", "O(1)"),
-            ]
-            
-            # Extract features and labels
-            X = [item[0] for item in training_data]
-            y = [item[1] for item in training_data]
-            
-            # Vectorize the code snippets
-            X_vectorized = self.vectorizer.fit_transform(X)
-            
-            # Train a simple classifier
-            self.model = RandomForestClassifier(n_estimators=10, random_state=42)
-            self.model.fit(X_vectorized, y)
-            self.is_trained = True
-            
-            print("✅ Simple ML model trained successfully")
-            
-        def predict_complexity(self, code):
-            """Predict time complexity using simple ML"""
-            if not self.is_trained:
-                self.train_simple_model()
-            
-            # Vectorize the input code
-            code_vectorized = self.vectorizer.transform([code])
-            
-            # Predict complexity
-            prediction = self.model.predict(code_vectorized)[0]
-            confidence = max(self.model.predict_proba(code_vectorized)[0])
-            
-            return prediction, confidence
-    
-    # Initialize the simple ML analyzer
-    ml_analyzer = SimpleMLAnalyzer()
-    
-    def analyze_with_ml(code, language):
-        """Analyze code using simple ML approach"""
+# The ML libraries are only imported on the first prediction; probing for them here
+# keeps their import cost out of every worker start
+ML_AVAILABLE = all(
+    importlib.util.find_spec(module) is not None
+    for module in ("numpy", "sklearn", "joblib")
+)
+
+# Fitted (vectorizer, training vectors, labels) persisted next to this module so requests never pay for fit()
+SIMPLE_MODEL_PATH = Path(__file__).parent / "simple_ml_model.joblib"
+# Bump when the persisted tuple changes so stale files are retrained instead of misread
+SIMPLE_MODEL_FORMAT = 2
+
+# Complexity classes the model predicts, indexed by class id, and the space complexity reported for each
+COMPLEXITY_CLASSES = ("O(1)", "O(n)", "O(n²)", "O(log n)", "O(2ⁿ)", "O(n log n)")
+CLASS_SPACE_COMPLEXITY = ("O(1)", "O(1)", "O(1)", "O(1)", "O(n)", "O(1)")
+
+# Training rows that vote on each prediction, weighted by their cosine similarity
+NEIGHBOURS = 3
+
+# Simple ML-based complexity analyzer
+class SimpleMLAnalyzer:
+    def __init__(self):
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        self.vectorizer = TfidfVectorizer(max_features=1000, stop_words='english')
+        self.train_vectors = None
+        self.label_ids = None
+        self.is_trained = False
+
+    def load_or_train(self):
+        """Load the persisted model; train and save it when missing or ML_RETRAIN=1"""
+        import joblib
+
+        if SIMPLE_MODEL_PATH.exists() and os.environ.get("ML_RETRAIN", "0") != "1":
+            try:
+                model_format, vectorizer, train_vectors, label_ids = joblib.load(SIMPLE_MODEL_PATH)
+                if model_format != SIMPLE_MODEL_FORMAT:
+                    raise ValueError(f"format {model_format}, expected {SIMPLE_MODEL_FORMAT}")
+                self.vectorizer, self.train_vectors, self.label_ids = vectorizer, train_vectors, label_ids
+                self.is_trained = True
+                return
+            except Exception as e:
+                print(f"⚠️ Could not load {SIMPLE_MODEL_PATH.name}, retraining: {e}")
+
+        self.train_simple_model()
         try:
-            # Extract key lines from code
-            lines = code.split('\n')
-            key_lines = []
-            
-            for line in lines:
-                line = line.strip()
-                if any(keyword in line.lower() for keyword in ['for', 'while', 'if', 'def', 'return', 'sort', 'in ']):
-                    key_lines.append(line)
-            
-            # Combine key lines for analysis
-            code_sample = ' '.join(key_lines[:5])  # Use first 5 key lines
-            
-            if not code_sample.strip():
-                return {
-                    "time_complexity": "Unknown",
-                    "space_complexity": "Unknown", 
-                    "breakdown": ["No analyzable patterns found"],
-                    "suggestions": ["Try adding more code structure"],
-                    "confidence": 0.0
-                }
-            
-            # Get ML prediction
-            prediction, confidence = ml_analyzer.predict_complexity(code_sample)
-            
-            # Map prediction to full response
-            complexity_map = {
-                "O(1)": {"time": "O(1)", "space": "O(1)"},
-                "O(n)": {"time": "O(n)", "space": "O(1)"},
-                "O(n²)": {"time": "O(n²)", "space": "O(1)"},
-                "O(log n)": {"time": "O(log n)", "space": "O(1)"},
-                "O(2ⁿ)": {"time": "O(2ⁿ)", "space": "O(n)"},
-                "O(n log n)": {"time": "O(n log n)", "space": "O(1)"}
-            }
-            
-            result = complexity_map.get(prediction, {"time": "Unknown", "space": "Unknown"})
-            
-            return {
-                "time_complexity": result["time"],
-                "space_complexity": result["space"],
-                "breakdown": [f"ML prediction: {prediction} (confidence: {confidence:.2f})"],
-                "suggestions": [
-                    "This analysis is based on machine learning patterns",
-                    "For more accuracy, consider the full algorithm structure"
-                ],
-                "confidence": confidence
-            }
-            
-        except Exception as e:
-            print(f"ML analysis error: {e}")
-            return {
-                "time_complexity": "Unknown",
-                "space_complexity": "Unknown",
-                "breakdown": [f"ML analysis failed: {str(e)}"],
-                "suggestions": ["Falling back to pattern-based analysis"],
-                "confidence": 0.0
-            }
-    
-    print("✅ Simple ML integration loaded successfully")
-    ML_AVAILABLE = True
-    
-except ImportError as e:
-    print(f"⚠️ Simple ML integration not available: {e}")
-    ML_AVAILABLE = False
-    
-    def analyze_with_ml(code, language):
-        return {
-            "time_complexity": "Unknown",
-            "space_complexity": "Unknown",
-            "breakdown": ["ML integration not available"],
-            "suggestions": ["Using basic pattern analysis"],
-            "confidence": 0.0
-        }
+            joblib.dump(
+                (SIMPLE_MODEL_FORMAT, self.vectorizer, self.train_vectors, self.label_ids),
+                SIMPLE_MODEL_PATH,
+                compress=3
+            )
+        except OSError as e:
+            print(f"⚠️ Could not save {SIMPLE_MODEL_PATH.name}: {e}")
+
+    def train_simple_model(self):
+        """Train a simple model with basic patterns"""
+        import numpy as np
+
+        # Simple training data based on code patterns
+        training_data = [
+            ("for i in range(n):", "O(n)"),
+            ("for i in range(n): for j in range(n):", "O(n²)"),
+            ("while left <= right:", "O(log n)"),
+            ("if x in list:", "O(n)"),
+            ("if x in set:", "O(1)"),
+            ("def recursive_function(n):", "O(2ⁿ)"),
+            ("return recursive_function(n-1)", "O(2ⁿ)"),
+            ("arr.sort()", "O(n log n)"),
+            ("return arr[0]", "O(1)"),
+            ("return len(arr)", "O(1)"),
+        ]
+
+        # Extract features and labels
+        X = [item[0] for item in training_data]
+        y = [item[1] for item in training_data]
+
+        # Vectorize the code snippets; with ten examples a nearest-neighbour lookup
+        # is all the "model" needed, so keep the vectors instead of fitting a forest
+        self.train_vectors = self.vectorizer.fit_transform(X)
+        self.label_ids = np.array([COMPLEXITY_CLASSES.index(label) for label in y])
+        self.is_trained = True
+
+        print("✅ Simple ML model trained successfully")
+
+    def predict_complexity(self, code):
+        """Predict time complexity using simple ML"""
+        class_id, confidence = self.predict_complexity_batch([code])[0]
+        return ("Unknown" if class_id is None else COMPLEXITY_CLASSES[class_id]), confidence
+
+    def predict_complexity_batch(self, codes):
+        """Predict (class id, confidence) for many snippets in one transform/predict call;
+        (None, 0.0) for a snippet the model has no basis to classify"""
+        probabilities = self.predict_proba_batch(codes)
+        predictions = probabilities.argmax(axis=1).tolist()
+        confidences = probabilities.max(axis=1)
+
+        return [(prediction, confidence) if confidence > 0 else (None, 0.0)
+                for prediction, confidence in zip(predictions, confidences)]
+
+    def predict_proba_batch(self, codes):
+        """Class probabilities over COMPLEXITY_CLASSES, one row per snippet; all zero for
+        a snippet sharing no vocabulary with the training rows"""
+        import numpy as np
+
+        # Vectorize the input code
+        codes_vectorized = self.vectorizer.transform(codes)
+
+        # TF-IDF rows are L2-normalised, so one sparse product gives every cosine similarity
+        similarities = (codes_vectorized @ self.train_vectors.T).toarray()
+
+        # Each class scores the summed similarity of its rows among the nearest neighbours,
+        # so snippets matching differently labelled rows equally split the probability
+        k = min(NEIGHBOURS, similarities.shape[1])
+        nearest = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+        rows = np.arange(len(codes))[:, np.newaxis]
+        scores = np.zeros((len(codes), len(COMPLEXITY_CLASSES)))
+        np.add.at(scores, (rows, self.label_ids[nearest]), similarities[rows, nearest])
+
+        # No shared vocabulary with any training row leaves the row at zero rather than
+        # inventing a distribution
+        totals = scores.sum(axis=1, keepdims=True)
+        return np.divide(scores, totals, out=np.zeros_like(scores), where=totals > 0)
+
+# The simple ML analyzer, created on first use by _get_ml_analyzer()
+ml_analyzer = None
+_ml_analyzer_lock = threading.Lock()
+
+def _get_ml_analyzer():
+    """Import the ML libraries and load (or train) the model the first time it is needed"""
+    global ml_analyzer
+    if ml_analyzer is None:
+        with _ml_analyzer_lock:
+            if ml_analyzer is None:
+                analyzer = SimpleMLAnalyzer()
+                analyzer.load_or_train()
+                ml_analyzer = analyzer
+                print("✅ Simple ML model loaded")
+    return ml_analyzer
+
+NO_PATTERNS_RESULT = {
+    "time_complexity": "Unknown",
+    "space_complexity": "Unknown",
+    "breakdown": ["No analyzable patterns found"],
+    "suggestions": ["Try adding more code structure"],
+    "confidence": 0.0
+}
+
+NO_MATCH_RESULT = {
+    "time_complexity": "Unknown",
+    "space_complexity": "Unknown",
+    "breakdown": ["ML prediction: no similar training patterns"],
+    "suggestions": ["Falling back to pattern-based analysis"],
+    "confidence": 0.0
+}
+
+ML_UNAVAILABLE_RESULT = {
+    "time_complexity": "Unknown",
+    "space_complexity": "Unknown",
+    "breakdown": ["ML integration not available"],
+    "suggestions": ["Using basic pattern analysis"],
+    "confidence": 0.0
+}
+
+# Plain substrings, not whole words: the model was trained on lines picked this way
+KEY_LINE_RE = re.compile(r'for|while|if|def|return|sort|in ')
+
+def _extract_code_sample(code):
+    """Join the first 5 key lines of the code into the sample the model sees"""
+    # Extract key lines from code, lowercasing once rather than per line
+    key_lines = []
+
+    for line, lowered in zip(code.split('\n'), code.lower().split('\n')):
+        if KEY_LINE_RE.search(lowered.strip()):
+            key_lines.append(line.strip())
+            if len(key_lines) == 5:  # Use first 5 key lines
+                break
+
+    # Combine key lines for analysis
+    return ' '.join(key_lines)
+
+def _build_result(class_id, confidence):
+    if class_id is None:
+        return dict(NO_MATCH_RESULT)
+
+    # Map the predicted class id straight to the full response
+    prediction = COMPLEXITY_CLASSES[class_id]
+
+    return {
+        "time_complexity": prediction,
+        "space_complexity": CLASS_SPACE_COMPLEXITY[class_id],
+        "breakdown": [f"ML prediction: {prediction} (confidence: {confidence:.2f})"],
+        "suggestions": [
+            "This analysis is based on machine learning patterns",
+            "For more accuracy, consider the full algorithm structure"
+        ],
+        "confidence": confidence
+    }
+
+def _error_result(e):
+    print(f"ML analysis error: {e}")
+    return {
+        "time_complexity": "Unknown",
+        "space_complexity": "Unknown",
+        "breakdown": [f"ML analysis failed: {str(e)}"],
+        "suggestions": ["Falling back to pattern-based analysis"],
+        "confidence": 0.0
+    }
+
+def analyze_with_ml(code, language):
+    """Analyze code using simple ML approach"""
+    if not ML_AVAILABLE:
+        return dict(ML_UNAVAILABLE_RESULT)
+
+    try:
+        code_sample = _extract_code_sample(code)
+
+        if not code_sample.strip():
+            return dict(NO_PATTERNS_RESULT)
+
+        # Get ML prediction, batched with whatever concurrent requests are waiting
+        class_id, confidence = prediction_batcher.predict(code_sample)
+        return _build_result(class_id, confidence)
+
+    except Exception as e:
+        return _error_result(e)
+
+# Micro-batching: /analyze-ml runs on the server's threadpool, so concurrent requests
+# share one vectorizer/model call instead of paying its dispatch cost each
+MAX_BATCH = int(os.environ.get("ML_MAX_BATCH", "32"))
+MAX_WAIT_MS = float(os.environ.get("ML_MAX_WAIT_MS", "5"))
+
+class PredictionBatcher:
+    """Collects (code_sample, future) pairs and resolves them with one batched prediction"""
+
+    def __init__(self, predict_batch, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS):
+        self.predict_batch = predict_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.SimpleQueue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+
+    def predict(self, code_sample):
+        """Block until the batch containing code_sample has been predicted"""
+        if self._worker is None:
+            with self._worker_lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name="ml-batcher", daemon=True)
+                    self._worker.start()
+
+        future = Future()
+        self._queue.put((code_sample, future))
+        return future.result()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+            try:
+                results = self.predict_batch([code_sample for code_sample, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+prediction_batcher = PredictionBatcher(lambda codes: _get_ml_analyzer().predict_complexity_batch(codes))
+
+print(f"🤖 Simple ML integration: {'Available' if ML_AVAILABLE else 'Not Available'}")
@@ -8,6 +8,9 @@ import requests
 import json
 import time
 
+# Shared session: keep-alive reuses one connection to the local server across calls
+session = requests.Session()
+
 def test_api_endpoint():
     """Test the API endpoint with various code examples"""
     
@@ -75,7 +78,7 @@ int main() {
         print(f"   Expected: {test_case['expected']}")
         
         try:
-            response = requests.post(
+            response = session.post(
                 "http://localhost:8000/analyze",
                 headers={"Content-Type": "application/json"},
                 json={
@@ -182,7 +185,7 @@ def main():
     
     # Check if server is running
     try:
-        response = requests.get("http://localhost:8000/health", timeout=5)
+        response = session.get("http://localhost:8000/health", timeout=5)
         if response.status_code == 200:
             print("✅ Backend server is running")
         else:
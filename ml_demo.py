@@ -8,6 +8,9 @@ import requests
 import json
 import time
 
+# Shared session: keep-alive reuses one connection to the local server across calls
+session = requests.Session()
+
 def test_ml_analysis():
     """Test ML-enhanced analysis with various algorithms"""
     
@@ -103,7 +106,7 @@ def fibonacci(n):
         
         # Regular analysis
         try:
-            response = requests.post(
+            response = session.post(
                 "http://localhost:8000/analyze",
                 json={
                     "code": test_case["code"],
@@ -132,7 +135,7 @@ def fibonacci(n):
         
         # ML-enhanced analysis
         try:
-            response = requests.post(
+            response = session.post(
                 "http://localhost:8000/analyze-ml",
                 json={
                     "code": test_case["code"],
@@ -4,15 +4,28 @@ Data Collector for TimeComplexity Analyzer ML Models
 Collects and prepares training data from various sources
 """
 
+import hashlib
 import json
-import os
-import requests
-from typing import List, Dict, Any
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Iterator, Tuple
 from dataclasses import dataclass
 import ast
 import re
 
-@dataclass
+try:
+    import orjson
+    
+    def _dump_record(record: Dict[str, Any]) -> bytes:
+        return orjson.dumps(record, option=orjson.OPT_INDENT_2)
+except ImportError:
+    def _dump_record(record: Dict[str, Any]) -> bytes:
+        return json.dumps(record, indent=2).encode()
+
+# dataclass(slots=True) needs Python 3.10+; older interpreters keep a __dict__
+_DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+@dataclass(frozen=True, **_DATACLASS_SLOTS)
 class CodeSample:
     code: str
     language: str
@@ -26,6 +39,8 @@ class CodeSample:
 class DataCollector:
     def __init__(self):
         self.samples = []
+        # extract_features results keyed by blake2b(code); sources overlap and datasets get re-saved
+        self._feature_cache: Dict[bytes, Dict[str, Any]] = {}
         self.sources = {
             'leetcode': 'https://leetcode.com/api/problems/all/',
             'geeksforgeeks': 'https://practice.geeksforgeeks.org/',
@@ -33,7 +48,7 @@ class DataCollector:
             'github': 'https://api.github.com/search/repositories'
         }
     
-    def collect_from_leetcode(self) -> List[CodeSample]:
+    def collect_from_leetcode(self) -> Iterator[CodeSample]:
         """Collect code samples from LeetCode problems"""
         print("🔍 Collecting data from LeetCode...")
         
@@ -146,9 +161,9 @@ def merge(left, right):
             }
         ]
         
-        samples = []
-        for item in leetcode_data:
-            sample = CodeSample(
+        print(f"✅ Collected {len(leetcode_data)} samples from LeetCode")
+        return (
+            CodeSample(
                 code=item["code"].strip(),
                 language="python",
                 time_complexity=item["time_complexity"],
@@ -158,12 +173,10 @@ def merge(left, right):
                 confidence=item["confidence"],
                 source="leetcode"
             )
-            samples.append(sample)
-        
-        print(f"✅ Collected {len(samples)} samples from LeetCode")
-        return samples
+            for item in leetcode_data
+        )
     
-    def collect_from_github(self) -> List[CodeSample]:
+    def collect_from_github(self) -> Iterator[CodeSample]:
         """Collect code samples from GitHub repositories"""
         print("🔍 Collecting data from GitHub...")
         
@@ -211,9 +224,9 @@ def dfs(graph, start, visited=None):
             }
         ]
         
-        samples = []
-        for item in github_samples:
-            sample = CodeSample(
+        print(f"✅ Collected {len(github_samples)} samples from GitHub")
+        return (
+            CodeSample(
                 code=item["code"].strip(),
                 language="python",
                 time_complexity=item["time_complexity"],
@@ -223,12 +236,10 @@ def dfs(graph, start, visited=None):
                 confidence=item["confidence"],
                 source="github"
             )
-            samples.append(sample)
-        
-        print(f"✅ Collected {len(samples)} samples from GitHub")
-        return samples
+            for item in github_samples
+        )
     
-    def collect_from_textbooks(self) -> List[CodeSample]:
+    def collect_from_textbooks(self) -> Iterator[CodeSample]:
         """Collect code samples from algorithm textbooks"""
         print("🔍 Collecting data from textbooks...")
         
@@ -287,9 +298,9 @@ def fibonacci_dp(n):
             }
         ]
         
-        samples = []
-        for item in textbook_samples:
-            sample = CodeSample(
+        print(f"✅ Collected {len(textbook_samples)} samples from textbooks")
+        return (
+            CodeSample(
                 code=item["code"].strip(),
                 language="python",
                 time_complexity=item["time_complexity"],
@@ -299,80 +310,112 @@ def fibonacci_dp(n):
                 confidence=item["confidence"],
                 source="textbook"
             )
-            samples.append(sample)
-        
-        print(f"✅ Collected {len(samples)} samples from textbooks")
-        return samples
+            for item in textbook_samples
+        )
     
     def extract_features(self, sample: CodeSample) -> Dict[str, Any]:
         """Extract features from code sample for ML training"""
+        code = sample.code
+        key = hashlib.blake2b(code.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        cached = self._feature_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        # Substrings used by more than one feature are scanned once
+        for_count = code.count('for ')
+        open_paren_count = code.count('(')
+        # recursion_count comes from the AST below: calls to an enclosing function by name
         features = {
-            'code_length': len(sample.code),
-            'line_count': sample.code.count('\n'),
-            'function_count': sample.code.count('def '),
-            'loop_count': sample.code.count('for ') + sample.code.count('while '),
-            'recursion_count': sample.code.count('(') - sample.code.count(')'),
-            'data_structure_count': sum([
-                sample.code.count('[]'), sample.code.count('{}'),
-                sample.code.count('list'), sample.code.count('dict'),
-                sample.code.count('set'), sample.code.count('heap')
-            ]),
+            'code_length': len(code),
+            'line_count': code.count('\n'),
+            'function_count': code.count('def '),
+            'loop_count': for_count + code.count('while '),
+            'recursion_count': 0,
+            'data_structure_count': (
+                code.count('[]') + code.count('{}') +
+                code.count('list') + code.count('dict') +
+                code.count('set') + code.count('heap')
+            ),
             'complexity_keywords': {
-                'linear': sample.code.count('range('),
-                'quadratic': sample.code.count('for ') * sample.code.count('for '),
-                'logarithmic': sample.code.count('// 2') + sample.code.count('>> 1'),
-                'exponential': sample.code.count('return') * sample.code.count('(')
+                'linear': code.count('range('),
+                'quadratic': for_count * for_count,
+                'logarithmic': code.count('// 2') + code.count('>> 1'),
+                'exponential': code.count('return') * open_paren_count
             }
         }
         
         # AST-based features
         try:
-            tree = ast.parse(sample.code)
-            features['ast_depth'] = self._get_ast_depth(tree)
-            features['ast_node_count'] = len(list(ast.walk(tree)))
-        except:
+            # compile() directly skips ast.parse's Python-level wrapper; dont_inherit keeps
+            # this module's __future__ flags out of the sample's compilation
+            tree = compile(code, '<sample>', 'exec', flags=ast.PyCF_ONLY_AST, dont_inherit=True)
+            (features['ast_depth'], features['ast_node_count'],
+             features['recursion_count']) = self._get_ast_stats(tree)
+        except (SyntaxError, ValueError, RecursionError):
+            # Unparsable code (ValueError: null bytes before 3.12; RecursionError: pathological nesting)
             features['ast_depth'] = 0
             features['ast_node_count'] = 0
         
+        self._feature_cache[key] = features
         return features
     
-    def _get_ast_depth(self, node: ast.AST, current_depth: int = 0) -> int:
-        """Calculate the maximum depth of AST"""
-        max_depth = current_depth
-        for child in ast.iter_child_nodes(node):
-            max_depth = max(max_depth, self._get_ast_depth(child, current_depth + 1))
-        return max_depth
+    def _get_ast_stats(self, tree: ast.AST) -> Tuple[int, int, int]:
+        """Calculate the maximum depth, node count and recursive call count of an AST in one iterative pass"""
+        max_depth = 0
+        node_count = 0
+        recursion_count = 0
+        # Each entry carries the names of the functions enclosing the node
+        stack = [(tree, 0, ())]
+        while stack:
+            node, depth, enclosing = stack.pop()
+            node_count += 1
+            if depth > max_depth:
+                max_depth = depth
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                enclosing = enclosing + (node.name,)
+            elif isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in enclosing:
+                recursion_count += 1
+            for child in ast.iter_child_nodes(node):
+                stack.append((child, depth + 1, enclosing))
+        return max_depth, node_count, recursion_count
     
     def save_dataset(self, filename: str = "ml_dataset.json"):
         """Save collected dataset to file"""
-        dataset = []
-        
-        for sample in self.samples:
-            features = self.extract_features(sample)
-            dataset.append({
-                'code': sample.code,
-                'language': sample.language,
-                'time_complexity': sample.time_complexity,
-                'space_complexity': sample.space_complexity,
-                'algorithm_type': sample.algorithm_type,
-                'patterns': sample.patterns,
-                'confidence': sample.confidence,
-                'source': sample.source,
-                'features': features
-            })
-        
-        with open(filename, 'w') as f:
-            json.dump(dataset, f, indent=2)
+        # Still one JSON array (prepare_training_data and the dataset tools json.load it),
+        # but written record by record instead of materializing the whole list first
+        with open(filename, 'wb') as f:
+            f.write(b'[')
+            for index, sample in enumerate(self.samples):
+                features = self.extract_features(sample)
+                record = {
+                    'code': sample.code,
+                    'language': sample.language,
+                    'time_complexity': sample.time_complexity,
+                    'space_complexity': sample.space_complexity,
+                    'algorithm_type': sample.algorithm_type,
+                    'patterns': sample.patterns,
+                    'confidence': sample.confidence,
+                    'source': sample.source,
+                    'features': features
+                }
+                f.write(b',\n' if index else b'\n')
+                f.write(_dump_record(record))
+            f.write(b'\n]\n' if self.samples else b']\n')
         
-        print(f"✅ Saved {len(dataset)} samples to {filename}")
+        print(f"✅ Saved {len(self.samples)} samples to {filename}")
     
     def collect_all(self):
         """Collect data from all sources"""
         print("🚀 Starting data collection...")
         
-        self.samples.extend(self.collect_from_leetcode())
-        self.samples.extend(self.collect_from_github())
-        self.samples.extend(self.collect_from_textbooks())
+        # Sources are independent, so collect them concurrently; results are extended on
+        # this thread in source order so the saved dataset stays deterministic
+        sources = (self.collect_from_leetcode, self.collect_from_github, self.collect_from_textbooks)
+        with ThreadPoolExecutor(max_workers=len(sources)) as executor:
+            # Collectors return lazy generators; materialize each one inside its worker
+            futures = [executor.submit(lambda source=source: list(source())) for source in sources]
+            for future in futures:
+                self.samples.extend(future.result())
         
         print(f"🎉 Total samples collected: {len(self.samples)}")
         self.save_dataset()
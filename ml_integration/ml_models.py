@@ -6,8 +6,7 @@ Ensemble of models for pattern recognition and complexity prediction
 
 import json
 import numpy as np
-import pandas as pd
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Optional, Tuple
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
 from sklearn.linear_model import LogisticRegression
 from sklearn.neural_network import MLPClassifier
@@ -22,7 +21,134 @@ except ImportError:
     XGBOOST_AVAILABLE = False
 import joblib
 import ast
+import hashlib
 import re
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+
+# Feature detector patterns, compiled once at import instead of on every extract_advanced_features call
+BASE_CASE_PATTERNS = tuple(re.compile(p) for p in (
+    r'if\s+\w+\s*<=\s*1',
+    r'if\s+len\s*\(\s*\w+\s*\)\s*<=\s*1',
+    r'if\s+not\s+\w+',
+    r'if\s+\w+\s*==\s*0',
+))
+
+BINARY_SEARCH_PATTERNS = tuple(re.compile(p) for p in (
+    r'while\s+\w+\s*<=\s*\w+',
+    r'mid\s*=\s*\(\s*\w+\s*\+\s*\w+\s*\)\s*//\s*2',
+    r'left\s*=\s*mid\s*\+\s*1',
+    r'right\s*=\s*mid\s*-\s*1',
+))
+
+DP_PATTERNS = tuple(re.compile(p) for p in (
+    r'dp\s*\[',
+    r'memo\s*\[',
+    r'cache\s*\[',
+    r'@lru_cache',
+    r'@memoize',
+))
+
+DIVIDE_CONQUER_PATTERNS = tuple(re.compile(p) for p in (
+    r'len\s*\(\s*\w+\s*\)\s*//\s*2',
+    r'mid\s*=\s*len\s*\(\s*\w+\s*\)\s*//\s*2',
+    r'left\s*=\s*\w+\s*\[\s*:\s*mid\s*\]',
+    r'right\s*=\s*\w+\s*\[\s*mid\s*:\s*\]',
+))
+
+GREEDY_PATTERNS = tuple(re.compile(p) for p in (
+    r'sort\s*\(',
+    r'sorted\s*\(',
+    r'max\s*\(',
+    r'min\s*\(',
+    r'heapq\.heappop',
+    r'heapq\.heappush',
+))
+
+BACKTRACKING_PATTERNS = tuple(re.compile(p) for p in (
+    r'backtrack\s*\(',
+    r'dfs\s*\(',
+    r'visited\s*=\s*set\s*\(',
+    r'visited\.add\s*\(',
+    r'visited\.remove\s*\(',
+))
+
+EXPONENTIAL_PATTERNS = tuple(re.compile(p) for p in (
+    r'return\s+\w+\s*\(\s*\w+\s*-\s*1\s*\)\s*\+\s*\w+\s*\(\s*\w+\s*-\s*2\s*\)',
+    r'return\s+\w+\s*\(\s*\w+\s*-\s*1\s*\)\s*\*\s*\w+\s*\(\s*\w+\s*-\s*1\s*\)',
+    r'for\s+\w+\s+in\s+itertools\.product',
+    r'for\s+\w+\s+in\s+itertools\.combinations',
+))
+
+LOGARITHMIC_PATTERNS = tuple(re.compile(p) for p in (
+    r'while\s+\w+\s*<=\s*\w+',
+    r'//\s*2',
+    r'>>\s*1',
+    r'math\.log',
+    r'math\.log2',
+))
+
+LINEAR_PATTERNS = tuple(re.compile(p) for p in (
+    r'for\s+\w+\s+in\s+range',
+    r'for\s+\w+\s+in\s+\w+',
+    r'while\s+\w+\s*<',
+    r'while\s+\w+\s*!=\s*\w+',
+))
+
+# Snippets whose extracted features are kept per analyzer
+FEATURE_CACHE_SIZE = 512
+
+# Datasets smaller than this are featurized in-process; pool start-up would dominate
+TRAINING_PARALLEL_THRESHOLD = 2048
+
+# Batches up to this size use the flattened forests; beyond it sklearn's per-tree predict is faster
+FLAT_FOREST_MAX_BATCH = 128
+
+class _FlatForest:
+    """A fitted RandomForestClassifier's trees concatenated into flat node arrays.
+
+    predict_proba walks every tree at once with NumPy gathers instead of sklearn's
+    per-tree dispatch, which dominates single-snippet inference. It follows sklearn's
+    float32 split comparisons and per-tree normalisation, so results are bit-identical.
+    """
+    
+    def __init__(self, forest: RandomForestClassifier):
+        trees = [estimator.tree_ for estimator in forest.estimators_]
+        self.roots = np.cumsum([0] + [tree.node_count for tree in trees[:-1]])
+        left, right, feature, threshold, value = [], [], [], [], []
+        for root, tree in zip(self.roots, trees):
+            # Leaves point at themselves so every sample can take the same number of steps
+            node_ids = np.arange(tree.node_count)
+            is_leaf = tree.children_left == -1
+            left.append(np.where(is_leaf, node_ids, tree.children_left) + root)
+            right.append(np.where(is_leaf, node_ids, tree.children_right) + root)
+            feature.append(np.where(is_leaf, 0, tree.feature))
+            threshold.append(tree.threshold)
+            proba = tree.value[:, 0, :forest.n_classes_]
+            normalizer = proba.sum(axis=1)
+            normalizer[normalizer == 0.0] = 1.0
+            value.append(proba / normalizer[:, np.newaxis])
+        self.left = np.concatenate(left)
+        self.right = np.concatenate(right)
+        self.feature = np.concatenate(feature)
+        self.threshold = np.concatenate(threshold)
+        self.value = np.concatenate(value)
+        self.depth = max(tree.max_depth for tree in trees)
+    
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float32)
+        nodes = np.tile(self.roots, (X.shape[0], 1))
+        rows = np.arange(X.shape[0])[:, np.newaxis]
+        for _ in range(self.depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        # Sum tree by tree, in order, exactly as sklearn accumulates them
+        proba = np.zeros((X.shape[0], self.value.shape[1]))
+        for leaves in nodes.T:
+            proba += self.value[leaves]
+        proba /= len(self.roots)
+        return proba
 
 class TimeComplexityMLAnalyzer:
     def __init__(self):
@@ -33,6 +159,11 @@ class TimeComplexityMLAnalyzer:
         self.is_trained = False
         self._calibration = {'time_temp': 1.0, 'space_temp': 1.0}
         self.meta_models = {}
+        # extract_advanced_features results keyed by (language, blake2b(code)), LRU-bounded
+        self._feature_cache: OrderedDict[Tuple[str, bytes], Dict[str, Any]] = OrderedDict()
+        self._feature_cache_lock = threading.Lock()
+        # (kind, model name) -> _FlatForest for the random forests, rebuilt when models change
+        self._flat_forests = {}
         
     def _normalize_label(self, label: str, kind: str) -> str:
         """Map variant labels to canonical forms supported by the classifier."""
@@ -58,14 +189,32 @@ class TimeComplexityMLAnalyzer:
         else:
             return space_map.get(s, s)
     
-    def extract_advanced_features(self, code: str, language: str = "python") -> Dict[str, Any]:
-        """Extract advanced features for ML analysis"""
+    def extract_advanced_features(self, code: str, language: str = "python",
+                                  tree: Optional[ast.Module] = None) -> Dict[str, Any]:
+        """Extract advanced features for ML analysis; tree is ast.parse(code) if already parsed"""
+        key = (language, hashlib.blake2b(code.encode("utf-8", "surrogatepass"), digest_size=16).digest())
+        with self._feature_cache_lock:
+            cached = self._feature_cache.get(key)
+            if cached is not None:
+                self._feature_cache.move_to_end(key)
+        if cached is None:
+            cached = self._extract_features_uncached(code, language, tree)
+            with self._feature_cache_lock:
+                self._feature_cache[key] = cached
+                if len(self._feature_cache) > FEATURE_CACHE_SIZE:
+                    self._feature_cache.popitem(last=False)
+        # Flat dict of numbers, so a shallow copy keeps callers from mutating the cache
+        return dict(cached)
+    
+    def _extract_features_uncached(self, code: str, language: str,
+                                   tree: Optional[ast.Module] = None) -> Dict[str, Any]:
+        """Run the full feature pipeline without consulting the cache"""
         features = {}
         
         # Basic code metrics
         features['code_length'] = len(code)
         features['line_count'] = code.count('\n') + 1
-        features['char_count'] = len(code.replace(' ', '').replace('\n', ''))
+        features['char_count'] = len(code) - code.count(' ') - code.count('\n')
         
         # Function and class analysis
         features['function_count'] = code.count('def ')
@@ -77,8 +226,8 @@ class TimeComplexityMLAnalyzer:
         features['while_loops'] = code.count('while ')
         features['total_loops'] = features['for_loops'] + features['while_loops']
         
-        # Recursion analysis
-        features['recursive_calls'] = self._count_recursive_calls(code)
+        # Recursion analysis; the AST features come from the same single parse and walk
+        ast_features, features['recursive_calls'] = self._extract_ast_features(code, tree)
         features['base_cases'] = self._count_base_cases(code)
         
         # Data structure usage
@@ -103,7 +252,6 @@ class TimeComplexityMLAnalyzer:
         features['linear_patterns'] = self._detect_linear(code)
         
         # AST-based features
-        ast_features = self._extract_ast_features(code)
         features.update(ast_features)
         
         # Language-specific features
@@ -124,122 +272,29 @@ class TimeComplexityMLAnalyzer:
         
         return features
     
-    def _count_recursive_calls(self, code: str) -> int:
-        """Count recursive function calls"""
-        try:
-            tree = ast.parse(code)
-            function_names = set()
-            recursive_calls = 0
-            
-            for node in ast.walk(tree):
-                if isinstance(node, ast.FunctionDef):
-                    function_names.add(node.name)
-                elif isinstance(node, ast.Call):
-                    if isinstance(node.func, ast.Name) and node.func.id in function_names:
-                        recursive_calls += 1
-            
-            return recursive_calls
-        except:
-            return 0
-    
     def _count_base_cases(self, code: str) -> int:
         """Count base cases in recursive functions"""
-        base_case_patterns = [
-            r'if\s+\w+\s*<=\s*1',
-            r'if\s+len\s*\(\s*\w+\s*\)\s*<=\s*1',
-            r'if\s+not\s+\w+',
-            r'if\s+\w+\s*==\s*0'
-        ]
-        
-        count = 0
-        for pattern in base_case_patterns:
-            count += len(re.findall(pattern, code))
-        
-        return count
+        return sum(len(pattern.findall(code)) for pattern in BASE_CASE_PATTERNS)
     
     def _detect_binary_search(self, code: str) -> int:
         """Detect binary search patterns"""
-        patterns = [
-            r'while\s+\w+\s*<=\s*\w+',
-            r'mid\s*=\s*\(\s*\w+\s*\+\s*\w+\s*\)\s*//\s*2',
-            r'left\s*=\s*mid\s*\+\s*1',
-            r'right\s*=\s*mid\s*-\s*1'
-        ]
-        
-        score = 0
-        for pattern in patterns:
-            if re.search(pattern, code):
-                score += 1
-        
-        return score
+        return sum(1 for pattern in BINARY_SEARCH_PATTERNS if pattern.search(code))
     
     def _detect_dp(self, code: str) -> int:
         """Detect dynamic programming patterns"""
-        patterns = [
-            r'dp\s*\[',
-            r'memo\s*\[',
-            r'cache\s*\[',
-            r'@lru_cache',
-            r'@memoize'
-        ]
-        
-        score = 0
-        for pattern in patterns:
-            if re.search(pattern, code):
-                score += 1
-        
-        return score
+        return sum(1 for pattern in DP_PATTERNS if pattern.search(code))
     
     def _detect_divide_conquer(self, code: str) -> int:
         """Detect divide and conquer patterns"""
-        patterns = [
-            r'len\s*\(\s*\w+\s*\)\s*//\s*2',
-            r'mid\s*=\s*len\s*\(\s*\w+\s*\)\s*//\s*2',
-            r'left\s*=\s*\w+\s*\[\s*:\s*mid\s*\]',
-            r'right\s*=\s*\w+\s*\[\s*mid\s*:\s*\]'
-        ]
-        
-        score = 0
-        for pattern in patterns:
-            if re.search(pattern, code):
-                score += 1
-        
-        return score
+        return sum(1 for pattern in DIVIDE_CONQUER_PATTERNS if pattern.search(code))
     
     def _detect_greedy(self, code: str) -> int:
         """Detect greedy algorithm patterns"""
-        patterns = [
-            r'sort\s*\(',
-            r'sorted\s*\(',
-            r'max\s*\(',
-            r'min\s*\(',
-            r'heapq\.heappop',
-            r'heapq\.heappush'
-        ]
-        
-        score = 0
-        for pattern in patterns:
-            if re.search(pattern, code):
-                score += 1
-        
-        return score
+        return sum(1 for pattern in GREEDY_PATTERNS if pattern.search(code))
     
     def _detect_backtracking(self, code: str) -> int:
         """Detect backtracking patterns"""
-        patterns = [
-            r'backtrack\s*\(',
-            r'dfs\s*\(',
-            r'visited\s*=\s*set\s*\(',
-            r'visited\.add\s*\(',
-            r'visited\.remove\s*\('
-        ]
-        
-        score = 0
-        for pattern in patterns:
-            if re.search(pattern, code):
-                score += 1
-        
-        return score
+        return sum(1 for pattern in BACKTRACKING_PATTERNS if pattern.search(code))
     
     def _count_nested_loops(self, code: str) -> int:
         """Count nested loop patterns"""
@@ -262,68 +317,50 @@ class TimeComplexityMLAnalyzer:
     
     def _detect_exponential(self, code: str) -> int:
         """Detect exponential complexity patterns"""
-        patterns = [
-            r'return\s+\w+\s*\(\s*\w+\s*-\s*1\s*\)\s*\+\s*\w+\s*\(\s*\w+\s*-\s*2\s*\)',
-            r'return\s+\w+\s*\(\s*\w+\s*-\s*1\s*\)\s*\*\s*\w+\s*\(\s*\w+\s*-\s*1\s*\)',
-            r'for\s+\w+\s+in\s+itertools\.product',
-            r'for\s+\w+\s+in\s+itertools\.combinations'
-        ]
-        
-        score = 0
-        for pattern in patterns:
-            if re.search(pattern, code):
-                score += 1
-        
-        return score
+        return sum(1 for pattern in EXPONENTIAL_PATTERNS if pattern.search(code))
     
     def _detect_logarithmic(self, code: str) -> int:
         """Detect logarithmic complexity patterns"""
-        patterns = [
-            r'while\s+\w+\s*<=\s*\w+',
-            r'//\s*2',
-            r'>>\s*1',
-            r'math\.log',
-            r'math\.log2'
-        ]
-        
-        score = 0
-        for pattern in patterns:
-            if re.search(pattern, code):
-                score += 1
-        
-        return score
+        return sum(1 for pattern in LOGARITHMIC_PATTERNS if pattern.search(code))
     
     def _detect_linear(self, code: str) -> int:
         """Detect linear complexity patterns"""
-        patterns = [
-            r'for\s+\w+\s+in\s+range',
-            r'for\s+\w+\s+in\s+\w+',
-            r'while\s+\w+\s*<',
-            r'while\s+\w+\s*!=\s*\w+'
-        ]
-        
-        score = 0
-        for pattern in patterns:
-            if re.search(pattern, code):
-                score += 1
-        
-        return score
+        return sum(1 for pattern in LINEAR_PATTERNS if pattern.search(code))
     
-    def _extract_ast_features(self, code: str) -> Dict[str, Any]:
-        """Extract AST-based features"""
+    def _extract_ast_features(self, code: str, tree: Optional[ast.Module] = None) -> Tuple[Dict[str, Any], int]:
+        """Extract AST-based features and the recursive call count from one parse and one walk"""
         try:
-            tree = ast.parse(code)
+            if tree is None:
+                tree = ast.parse(code)
             
-            # Count different node types
+            # Breadth-first like ast.walk, whose visiting order the recursion count depends on:
+            # a call only counts once a function of that name has been seen
             node_counts = {}
-            for node in ast.walk(tree):
+            node_count = 0
+            max_depth = 0
+            function_names = set()
+            recursive_calls = 0
+            queue = deque([(tree, 0)])
+            iter_child_nodes = ast.iter_child_nodes
+            while queue:
+                node, depth = queue.popleft()
+                node_count += 1
+                if depth > max_depth:
+                    max_depth = depth
                 node_type = type(node).__name__
                 node_counts[node_type] = node_counts.get(node_type, 0) + 1
+                if isinstance(node, ast.FunctionDef):
+                    function_names.add(node.name)
+                elif isinstance(node, ast.Call):
+                    if isinstance(node.func, ast.Name) and node.func.id in function_names:
+                        recursive_calls += 1
+                depth += 1
+                queue.extend((child, depth) for child in iter_child_nodes(node))
             
             # Calculate AST metrics
             features = {
-                'ast_depth': self._get_ast_depth(tree),
-                'ast_node_count': len(list(ast.walk(tree))),
+                'ast_depth': max_depth,
+                'ast_node_count': node_count,
                 'ast_function_defs': node_counts.get('FunctionDef', 0),
                 'ast_for_loops': node_counts.get('For', 0),
                 'ast_while_loops': node_counts.get('While', 0),
@@ -333,7 +370,7 @@ class TimeComplexityMLAnalyzer:
                 'ast_returns': node_counts.get('Return', 0)
             }
             
-            return features
+            return features, recursive_calls
         except:
             return {
                 'ast_depth': 0,
@@ -345,14 +382,7 @@ class TimeComplexityMLAnalyzer:
                 'ast_calls': 0,
                 'ast_assignments': 0,
                 'ast_returns': 0
-            }
-    
-    def _get_ast_depth(self, node: ast.AST, current_depth: int = 0) -> int:
-        """Calculate maximum AST depth"""
-        max_depth = current_depth
-        for child in ast.iter_child_nodes(node):
-            max_depth = max(max_depth, self._get_ast_depth(child, current_depth + 1))
-        return max_depth
+            }, 0
     
     def _extract_python_features(self, code: str) -> Dict[str, Any]:
         """Extract Python-specific features"""
@@ -499,26 +529,18 @@ class TimeComplexityMLAnalyzer:
         with open(dataset_file, 'r') as f:
             data = json.load(f)
         
-        X = []
-        y_time = []
-        y_space = []
+        if len(data) < TRAINING_PARALLEL_THRESHOLD:
+            rows = [_extract_row(item, self) for item in data]
+        else:
+            with ProcessPoolExecutor(initializer=_init_feature_worker) as executor:
+                rows = list(executor.map(_extract_row, data, chunksize=64))
         
-        self.feature_names = []
-        first_features = None
-        for idx, item in enumerate(data):
-            features = self.extract_advanced_features(item['code'], item['language'])
-            if first_features is None:
-                # Freeze feature order for scaler and models
-                first_features = features
-                self.feature_names = list(first_features.keys())
-            # Align each sample to the frozen feature order
-            X.append([features.get(name, 0) for name in self.feature_names])
-            y_time.append(self._normalize_label(item['time_complexity'], 'time'))
-            y_space.append(self._normalize_label(item['space_complexity'], 'space'))
-        
-        X = np.array(X)
-        y_time = np.array(y_time)
-        y_space = np.array(y_space)
+        # Freeze feature order for scaler and models from the first sample; samples of
+        # other languages are aligned to it, with their missing features counted as 0
+        self.feature_names = list(rows[0][0]) if rows else []
+        X = np.array([[features.get(name, 0) for name in self.feature_names] for features, _, _ in rows])
+        y_time = np.array([self._normalize_label(row[1], 'time') for row in rows])
+        y_space = np.array([self._normalize_label(row[2], 'space') for row in rows])
         
         print(f"✅ Prepared {len(X)} samples with {len(self.feature_names)} features")
         return X, y_time, y_space
@@ -619,6 +641,7 @@ class TimeComplexityMLAnalyzer:
             self.meta_models['time_meta'] = None
             self.meta_models['time_meta_classes'] = time_classes
         
+        self._flat_forests = self._flatten_forests()
         self.is_trained = True
         print("✅ All models trained successfully!")
     
@@ -670,20 +693,64 @@ class TimeComplexityMLAnalyzer:
                 best_T = T
         return float(best_T)
     
-    def predict_complexity(self, code: str, language: str = "python") -> Dict[str, Any]:
-        """Predict time and space complexity using ensemble"""
+    def predict_complexity(self, code: str, language: str = "python",
+                           tree: Optional[ast.Module] = None) -> Dict[str, Any]:
+        """Predict time and space complexity using ensemble; tree is ast.parse(code) if already parsed"""
+        return self.predict_complexity_batch([code], language, [tree])[0]
+    
+    def _ensemble_probs(self, kind: str, X_scaled: np.ndarray, classes: List[str]) -> np.ndarray:
+        """Average the per-class probabilities of every model for kind, one row per sample"""
+        encoder = self.label_encoders[kind]
+        class_index = {c: i for i, c in enumerate(classes)}
+        probs = np.zeros((X_scaled.shape[0], len(classes)), dtype=float)
+        rows = np.arange(X_scaled.shape[0])
+        models_count = 0
+        
+        small_batch = X_scaled.shape[0] <= FLAT_FOREST_MAX_BATCH and not np.isnan(X_scaled).any()
+        for name, model in self.models[kind].items():
+            if hasattr(model, 'predict_proba'):
+                flat_forest = self._flat_forests.get((kind, name)) if small_batch else None
+                proba = (flat_forest or model).predict_proba(X_scaled)
+                # Align to global classes using encoded labels
+                model_classes = getattr(model, 'classes_', [])
+                if len(model_classes):
+                    columns = [class_index[c] for c in encoder.inverse_transform(model_classes)]
+                    probs[:, columns] += proba[:, :len(columns)]
+            else:
+                preds = encoder.inverse_transform(model.predict(X_scaled))
+                probs[rows, [class_index[c] for c in preds]] += 1.0
+            models_count += 1
+        
+        if models_count > 0:
+            probs /= models_count
+        return probs
+    
+    def _flatten_forests(self) -> Dict[Tuple[str, str], _FlatForest]:
+        """Flatten every random forest in the ensemble for fast small-batch inference"""
+        return {
+            (kind, name): _FlatForest(model)
+            for kind, models in self.models.items()
+            for name, model in models.items()
+            if isinstance(model, RandomForestClassifier)
+        }
+    
+    def predict_complexity_batch(self, codes: List[str], language: str = "python",
+                                 trees: Optional[List[Optional[ast.Module]]] = None) -> List[Dict[str, Any]]:
+        """Predict complexities for many snippets with one scaler and model call per ensemble member"""
         if not self.is_trained:
             raise ValueError("Models not trained. Call train_models() first.")
-        
-        # Extract features
-        features = self.extract_advanced_features(code, language)
-        
-        # Align features to the model's expected order/size
-        if self.feature_names:
-            aligned = [features.get(name, 0) for name in self.feature_names]
-            X = np.array([aligned])
-        else:
-            X = np.array([list(features.values())])
+        if trees is None:
+            trees = [None] * len(codes)
+        
+        # Extract features, aligned to the model's expected order/size
+        rows = []
+        for code, tree in zip(codes, trees):
+            features = self.extract_advanced_features(code, language, tree)
+            if self.feature_names:
+                rows.append([features.get(name, 0) for name in self.feature_names])
+            else:
+                rows.append(list(features.values()))
+        X = np.array(rows)
         
         # Scale features
         X_scaled = self.scalers['feature_scaler'].transform(X)
@@ -692,85 +759,44 @@ class TimeComplexityMLAnalyzer:
         # Build stable class lists from encoders
         time_classes = list(self.label_encoders['time_complexity'].classes_)
         space_classes = list(self.label_encoders['space_complexity'].classes_)
-        time_index = {c: i for i, c in enumerate(time_classes)}
-        space_index = {c: i for i, c in enumerate(space_classes)}
-        
-        time_probs = np.zeros(len(time_classes), dtype=float)
-        space_probs = np.zeros(len(space_classes), dtype=float)
-        time_models_count = 0
-        space_models_count = 0
-        
-        for name, model in self.models['time_complexity'].items():
-            if hasattr(model, 'predict_proba'):
-                proba = model.predict_proba(X_scaled)[0]
-                # Align to global time classes using encoded labels
-                for col, enc_lab in enumerate(getattr(model, 'classes_', [])):
-                    cls = self.label_encoders['time_complexity'].inverse_transform([enc_lab])[0]
-                    time_probs[time_index[cls]] += float(proba[col])
-                time_models_count += 1
-            else:
-                pred = model.predict(X_scaled)[0]
-                cls = self.label_encoders['time_complexity'].inverse_transform([pred])[0]
-                time_probs[time_index[cls]] += 1.0
-                time_models_count += 1
-        
-        for name, model in self.models['space_complexity'].items():
-            if hasattr(model, 'predict_proba'):
-                proba = model.predict_proba(X_scaled)[0]
-                for col, enc_lab in enumerate(getattr(model, 'classes_', [])):
-                    cls = self.label_encoders['space_complexity'].inverse_transform([enc_lab])[0]
-                    space_probs[space_index[cls]] += float(proba[col])
-                space_models_count += 1
-            else:
-                pred = model.predict(X_scaled)[0]
-                cls = self.label_encoders['space_complexity'].inverse_transform([pred])[0]
-                space_probs[space_index[cls]] += 1.0
-                space_models_count += 1
-        
-        if time_models_count > 0:
-            time_probs /= time_models_count
-        if space_models_count > 0:
-            space_probs /= space_models_count
+        time_probs = self._ensemble_probs('time_complexity', X_scaled, time_classes)
+        space_probs = self._ensemble_probs('space_complexity', X_scaled, space_classes)
         
         # Apply temperature scaling
         Tt = (self._calibration or {}).get('time_temp', 1.0)
         Ts = (self._calibration or {}).get('space_temp', 1.0)
         time_probs = np.clip(time_probs ** (1.0 / Tt), 1e-9, 1.0)
         space_probs = np.clip(space_probs ** (1.0 / Ts), 1e-9, 1.0)
-        time_probs = time_probs / time_probs.sum()
-        space_probs = space_probs / space_probs.sum()
+        time_probs = time_probs / time_probs.sum(axis=1, keepdims=True)
+        space_probs = space_probs / space_probs.sum(axis=1, keepdims=True)
         
         # Meta combiner (time): combine averaged probs + composite flags
         if self.meta_models.get('time_meta') is not None:
             comp_indices = [idx for idx, name in enumerate(self.feature_names) if name.startswith('comp_')]
-            comp_vec = X[0, comp_indices] if comp_indices else np.zeros((0,), dtype=float)
-            meta_input = np.concatenate([time_probs, comp_vec])
+            comp_mat = X[:, comp_indices] if comp_indices else np.zeros((X.shape[0], 0), dtype=float)
+            meta_input = np.hstack([time_probs, comp_mat])
             meta = self.meta_models['time_meta']
-            meta_proba = meta.predict_proba(meta_input.reshape(1, -1))[0]
+            meta_proba = meta.predict_proba(meta_input)
             # Blend: average base probs with meta probs (mapped to class order)
             # meta classes already align with encoder indices used during training
-            meta_classes = self.meta_models.get('time_meta_classes', time_classes)
-            # Map meta proba order to time_classes index order
             # Assume encoders stable; average directly if lengths match
-            if len(meta_proba) == len(time_probs):
+            if meta_proba.shape[1] == time_probs.shape[1]:
                 time_probs = (time_probs + meta_proba) / 2.0
-                time_probs = time_probs / time_probs.sum()
-        
-        time_top_idx = int(np.argmax(time_probs))
-        space_top_idx = int(np.argmax(space_probs))
-        time_complexity = time_classes[time_top_idx]
-        space_complexity = space_classes[space_top_idx]
-        time_confidence = float(time_probs[time_top_idx])
-        space_confidence = float(space_probs[space_top_idx])
-        
-        return {
-            'time_complexity': time_complexity,
-            'space_complexity': space_complexity,
-            'time_confidence': time_confidence,
-            'space_confidence': space_confidence,
-            'time_probabilities': {cls: float(time_probs[i]) for i, cls in enumerate(time_classes)},
-            'space_probabilities': {cls: float(space_probs[i]) for i, cls in enumerate(space_classes)}
-        }
+                time_probs = time_probs / time_probs.sum(axis=1, keepdims=True)
+        
+        results = []
+        for row_time, row_space in zip(time_probs, space_probs):
+            time_top_idx = int(np.argmax(row_time))
+            space_top_idx = int(np.argmax(row_space))
+            results.append({
+                'time_complexity': time_classes[time_top_idx],
+                'space_complexity': space_classes[space_top_idx],
+                'time_confidence': float(row_time[time_top_idx]),
+                'space_confidence': float(row_space[space_top_idx]),
+                'time_probabilities': {cls: float(row_time[i]) for i, cls in enumerate(time_classes)},
+                'space_probabilities': {cls: float(row_space[i]) for i, cls in enumerate(space_classes)}
+            })
+        return results
     
     def save_models(self, filepath: str):
         """Save trained models"""
@@ -801,9 +827,23 @@ class TimeComplexityMLAnalyzer:
         self.is_trained = model_data['is_trained']
         self._calibration = model_data.get('calibration', {'time_temp': 1.0, 'space_temp': 1.0})
         self.meta_models = model_data.get('meta_models', {})
+        self._flat_forests = self._flatten_forests()
         
         print(f"✅ Models loaded from {filepath}")
 
+# Each prepare_training_data worker process's analyzer, set by _init_feature_worker
+_feature_analyzer = None
+
+def _init_feature_worker():
+    """Give each prepare_training_data worker process its own analyzer"""
+    global _feature_analyzer
+    _feature_analyzer = TimeComplexityMLAnalyzer()
+
+def _extract_row(item: Dict[str, Any], analyzer: Optional[TimeComplexityMLAnalyzer] = None) -> Tuple[Dict[str, Any], str, str]:
+    """Features and raw time/space labels for one dataset item"""
+    features = (analyzer or _feature_analyzer).extract_advanced_features(item['code'], item['language'])
+    return features, item['time_complexity'], item['space_complexity']
+
 if __name__ == "__main__":
     # Example usage
     analyzer = TimeComplexityMLAnalyzer()
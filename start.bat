@@ -2,6 +2,5 @@
 REM Start script for TimeComplexity Analyzer
 cd /d "%~dp0"
 call venv\Scripts\activate.bat
-cd backend
-python main.py
+python -m backend.main
 pause
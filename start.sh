@@ -2,5 +2,4 @@
 # Start script for TimeComplexity Analyzer
 cd "$(dirname "$0")"
 source venv/bin/activate
-cd backend
-python main.py
+python -m backend.main
@@ -45,11 +45,8 @@ def start_server():
     print("-" * 50)
     
     try:
-        # Change to backend directory
-        os.chdir("backend")
-        
-        # Start the server
-        subprocess.run([sys.executable, "main.py"])
+        # Start the server as a package module so backend.main's relative imports resolve
+        subprocess.run([sys.executable, "-m", "backend.main"])
     except KeyboardInterrupt:
         print("\n🛑 Server stopped by user")
     except FileNotFoundError:
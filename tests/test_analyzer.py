@@ -0,0 +1,78 @@
+import unittest
+from unittest import mock
+
+from backend import analyzer as analyzer_module
+from backend.analyzer import TimeComplexityAnalyzer
+
+CPP_NESTED_LOOP = (
+    "for (int i = 0; i < n; i++) {\n"
+    "    for (int j = 0; j < n; j++) {\n"
+    "        sum += a[i][j];\n"
+    "    }\n"
+    "}\n"
+)
+
+
+class LoneSurrogateTest(unittest.TestCase):
+    """Code that is not strictly UTF-8 encodable must analyze like the same code without it"""
+
+    def test_cpp_nested_loop_with_surrogate(self):
+        analyzer = TimeComplexityAnalyzer()
+        expected = analyzer.analyze(CPP_NESTED_LOOP, "cpp")
+        result = analyzer.analyze(CPP_NESTED_LOOP + '// "\ud800"\n', "cpp")
+        self.assertEqual(result["time_complexity"], "O(n²)")
+        self.assertEqual(result["time_complexity"], expected["time_complexity"])
+        self.assertEqual(result["confidence"], expected["confidence"])
+
+
+class NonAsciiIdentifierTest(unittest.TestCase):
+    """Unicode identifiers must match \\w the way re does, whether or not google-re2 is installed"""
+
+    def test_python_nested_loop_with_non_ascii_variable(self):
+        code = "for ñ in range(n):\n    for j in range(n):\n        total += ñ * j\n"
+        result = TimeComplexityAnalyzer().analyze(code, "python")
+        self.assertEqual(result["time_complexity"], "O(n²)")
+
+    def test_cpp_nested_loop_with_non_ascii_variable(self):
+        code = (
+            "for (int índice = 0; índice < n; índice++) {\n"
+            "    for (int j = 0; j < n; j++) {\n"
+            "        sum += a[índice][j];\n"
+            "    }\n"
+            "}\n"
+        )
+        result = TimeComplexityAnalyzer().analyze(code, "cpp")
+        self.assertEqual(result["time_complexity"], "O(n²)")
+        self.assertEqual(result["confidence"], TimeComplexityAnalyzer().analyze(CPP_NESTED_LOOP, "cpp")["confidence"])
+
+
+class PatternScanTest(unittest.TestCase):
+
+    def test_every_matching_pattern_is_reported(self):
+        # An exponential match must not stop the scan before the more confident sort pattern
+        code = "def fib(n):\n    return fib(n-1) + fib(n-2)\narr.sort()\n"
+        result = TimeComplexityAnalyzer().analyze(code, "python")
+        self.assertEqual(result["time_complexity"], "O(2ⁿ)")
+        self.assertEqual(result["confidence"], 0.95)
+        self.assertEqual(result["breakdown"], [
+            "Found 1 instances of Fibonacci-like recursion",
+            "Found 1 instances of Built-in sort",
+        ])
+
+
+class LiteralAnchorTest(unittest.TestCase):
+
+    def test_anchor_is_longest_literal_run(self):
+        self.assertEqual(analyzer_module._literal_anchor(r"\.sort\s*\("), ".sort")
+
+    def test_no_anchor_without_parser(self):
+        with mock.patch.object(analyzer_module, "sre_parse", None):
+            self.assertEqual(analyzer_module._literal_anchor(r"\.sort\s*\("), "")
+
+    def test_no_anchor_when_parser_output_changes(self):
+        with mock.patch.object(analyzer_module.sre_parse, "parse", return_value=[("unexpected",)]):
+            self.assertEqual(analyzer_module._literal_anchor(r"\.sort\s*\("), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
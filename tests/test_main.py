@@ -0,0 +1,81 @@
+import importlib
+import os
+import subprocess
+import sys
+import unittest
+from unittest import mock
+
+from fastapi.testclient import TestClient
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PYTHON_NESTED_LOOP = "for i in range(n):\n    for j in range(n):\n        total += i * j\n"
+
+LISTED_ORIGIN = "chrome-extension://" + "a" * 32
+UNLISTED_ORIGIN = "chrome-extension://" + "b" * 32
+
+
+def preflight(client, origin):
+    return client.options("/analyze", headers={
+        "Origin": origin,
+        "Access-Control-Request-Method": "POST",
+        "Access-Control-Request-Headers": "Content-Type",
+    })
+
+
+class ExtensionCorsTest(unittest.TestCase):
+    """EXTENSION_IDS is read at import, so each case reloads backend.main under its environment"""
+
+    def load_app(self, extension_ids):
+        with mock.patch.dict(os.environ, {"EXTENSION_IDS": extension_ids}):
+            import backend.main
+            return importlib.reload(backend.main).app
+
+    def test_unlisted_extension_rejected_when_ids_set(self):
+        client = TestClient(self.load_app("a" * 32))
+        self.assertEqual(preflight(client, LISTED_ORIGIN).headers.get("access-control-allow-origin"), LISTED_ORIGIN)
+        response = preflight(client, UNLISTED_ORIGIN)
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn("access-control-allow-origin", response.headers)
+
+    def test_any_extension_allowed_when_ids_unset(self):
+        client = TestClient(self.load_app(""))
+        response = preflight(client, UNLISTED_ORIGIN)
+        self.assertEqual(response.headers.get("access-control-allow-origin"), UNLISTED_ORIGIN)
+
+
+class MlBackendTest(unittest.TestCase):
+
+    def load_app(self, ml_backend):
+        with mock.patch.dict(os.environ, {"ML_BACKEND": ml_backend, "EXTENSION_IDS": ""}):
+            import backend.main
+            return importlib.reload(backend.main).app
+
+    def test_only_selected_integration_imported(self):
+        # A fresh interpreter, since other tests reload backend.main under both backends
+        for ml_backend, expected in (("hybrid", "backend.ml_integration"), ("simple", "backend.ml_integration_simple")):
+            with self.subTest(ml_backend=ml_backend):
+                output = subprocess.run(
+                    [sys.executable, "-c",
+                     "import sys, backend.main; print(*sorted(m for m in sys.modules"
+                     " if m in ('backend.ml_integration', 'backend.ml_integration_simple')))"],
+                    cwd=PROJECT_ROOT, env={**os.environ, "ML_BACKEND": ml_backend},
+                    capture_output=True, text=True, check=True,
+                ).stdout.splitlines()[-1]
+                self.assertEqual(output.split(), [expected])
+
+    def test_simple_backend_does_not_serve_analyze(self):
+        client = TestClient(self.load_app("simple"))
+        response = client.post("/analyze", json={"code": PYTHON_NESTED_LOOP, "language": "python"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["time_complexity"], "O(n²)")
+
+    def test_uncertain_simple_prediction_falls_back(self):
+        # The simple model can't tell a nested range loop from a single one
+        client = TestClient(self.load_app("simple"))
+        response = client.post("/analyze-ml", json={"code": PYTHON_NESTED_LOOP, "language": "python"})
+        self.assertEqual(response.json()["time_complexity"], "O(n²)")
+
+
+if __name__ == "__main__":
+    unittest.main()
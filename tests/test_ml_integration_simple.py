@@ -0,0 +1,62 @@
+import threading
+import unittest
+
+from backend.ml_integration_simple import ML_AVAILABLE, PredictionBatcher, SimpleMLAnalyzer
+
+
+class PredictionBatcherTest(unittest.TestCase):
+
+    def test_concurrent_callers_share_one_batch(self):
+        batch_sizes = []
+
+        def predict_batch(codes):
+            batch_sizes.append(len(codes))
+            return [(len(code), 1.0) for code in codes]
+
+        # A long wait, flushed early by the full batch, keeps the grouping deterministic
+        batcher = PredictionBatcher(predict_batch, max_batch=8, max_wait_ms=5000)
+        samples = ["x" * i for i in range(8)]
+        results = [None] * len(samples)
+
+        def call(index):
+            results[index] = batcher.predict(samples[index])
+
+        threads = [threading.Thread(target=call, args=(index,)) for index in range(len(samples))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=10)
+
+        self.assertEqual(batch_sizes, [8])
+        self.assertEqual(results, [(i, 1.0) for i in range(8)])
+
+    def test_prediction_error_reaches_every_caller(self):
+        def predict_batch(codes):
+            raise ValueError("model unavailable")
+
+        batcher = PredictionBatcher(predict_batch, max_batch=1, max_wait_ms=0)
+        with self.assertRaises(ValueError):
+            batcher.predict("for i in range(n):")
+
+
+@unittest.skipUnless(ML_AVAILABLE, "needs numpy, sklearn and joblib")
+class SimpleMLAnalyzerTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.analyzer = SimpleMLAnalyzer()
+        cls.analyzer.train_simple_model()
+
+    def test_probabilities_are_a_distribution(self):
+        probabilities = self.analyzer.predict_proba_batch(["for i in range(n): for j in range(n):"])
+        self.assertAlmostEqual(probabilities.sum(), 1.0)
+        # Identical to the single loop after stop words, so the two labels split evenly
+        self.assertAlmostEqual(probabilities.max(), 0.5)
+
+    def test_no_shared_vocabulary_is_unknown(self):
+        self.assertEqual(self.analyzer.predict_complexity_batch(["zzz qqq"]), [(None, 0.0)])
+        self.assertEqual(self.analyzer.predict_complexity("zzz qqq"), ("Unknown", 0.0))
+
+
+if __name__ == "__main__":
+    unittest.main()